@@ -2,15 +2,45 @@
 """
 Backend API for VPC demonstration
 Serves JSON data about system and VPC information
+
+Serving is tuned through environment variables:
+  SERVER_MODE      'threaded' (default) or 'asyncio'
+  WORKERS          processes sharing the port via SO_REUSEPORT ('auto' = one per CPU)
+  THREADS          worker threads per process in threaded mode (default 64)
+  REQUEST_TIMEOUT  seconds a connection may sit idle or stall mid-request (default 15)
+  DRAIN_TIMEOUT    seconds to finish in-flight requests after SIGTERM (default 10)
+
+Datasets are read from USERS_FILE and PRODUCTS_FILE (.jsonl or .csv) when set,
+otherwise the built-in sample rows are served. Dataset endpoints take:
+  ?endpoint=users&limit=50&cursor=<next_cursor>   pagination
+  &fields=id,name                                 projection
+  &role=admin  &stock<10  (=, !=, <, <=, >, >=)   filters
+  &format=ndjson                                  stream every match as NDJSON
 """
 
 import http.server
 import socketserver
 import socket
+import selectors
 import os
+import re
+import sys
+import csv
 import json
+import gzip
+import keyword
+import time
+import hashlib
+import queue
+import signal
+import asyncio
+import threading
+from bisect import bisect_left
+from collections import namedtuple
+from email.utils import formatdate
+from http import HTTPStatus
 from datetime import datetime
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse, unquote_plus
 
 # Get VPC information from environment or defaults
 VPC_NAME = os.environ.get('VPC_NAME', 'Unknown')
@@ -24,6 +54,27 @@ try:
 except:
     HOSTNAME = 'Unknown'
 
+
+def env_int(name, default, minimum=1):
+    """Read a positive integer setting, falling back to the default"""
+    try:
+        value = int(os.environ.get(name, default))
+    except (ValueError, TypeError):
+        return default
+    return value if value >= minimum else default
+
+
+# Serving configuration
+SERVER_MODE = os.environ.get('SERVER_MODE', 'threaded')
+if os.environ.get('WORKERS') == 'auto':
+    WORKERS = os.cpu_count() or 1
+else:
+    WORKERS = env_int('WORKERS', 1)
+THREADS = env_int('THREADS', 64)
+REQUEST_TIMEOUT = env_int('REQUEST_TIMEOUT', 15)
+DRAIN_TIMEOUT = env_int('DRAIN_TIMEOUT', 10, minimum=0)
+LISTEN_BACKLOG = 1024
+
 # Sample data to serve
 SAMPLE_DATA = {
     "service": "backend-api",
@@ -38,7 +89,6 @@ SAMPLE_DATA = {
         "subnet_type": "private"
     },
     "system_info": {
-        "timestamp": datetime.now().isoformat(),
         "uptime": "N/A",
         "environment": "VPC Private Subnet"
     },
@@ -52,76 +102,846 @@ SAMPLE_DATA = {
             {"id": 1, "name": "Product A", "price": 99.99, "stock": 50},
             {"id": 2, "name": "Product B", "price": 149.99, "stock": 30},
             {"id": 3, "name": "Product C", "price": 199.99, "stock": 20}
-        ],
-        "stats": {
-            "total_users": 3,
-            "total_products": 3,
-            "total_revenue": 10499.70,
-            "last_updated": datetime.now().isoformat()
-        }
+        ]
     }
 }
 
-class BackendAPIHandler(http.server.SimpleHTTPRequestHandler):
-    """Custom HTTP handler that serves JSON API"""
-    
+CORS_HEADERS = [
+    ('Access-Control-Allow-Origin', '*'),
+    ('Access-Control-Allow-Methods', 'GET, OPTIONS'),
+    ('Access-Control-Allow-Headers', 'Content-Type'),
+]
+
+
+# Datasets
+USERS_FILE = os.environ.get('USERS_FILE')
+PRODUCTS_FILE = os.environ.get('PRODUCTS_FILE')
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+INDEX_MAX_DISTINCT = 1024  # fields with more distinct values are scanned, not indexed
+STREAM_CHUNK_BYTES = 64 * 1024
+FILTER_PATTERN = re.compile(r'^([^<>=!]+)(<=|>=|!=|<|>|=)(.*)$')
+QUERY_PARAMS = ('endpoint', 'limit', 'cursor', 'fields', 'format')
+
+# Running totals reported by ?endpoint=stats, summed as records are added
+AGGREGATES = {
+    'products': {'total_revenue': lambda r: (r.price or 0) * (r.stock or 0)},
+}
+
+FILTER_OPERATORS = {
+    '=': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+
+
+class QueryError(Exception):
+    """A dataset query the client got wrong; answered with 400"""
+
+
+def coerce(value):
+    """Convert a CSV or query string value to int or float where it parses"""
+    if value is None or value == '':
+        return None
+    for kind in (int, float):
+        try:
+            return kind(value)
+        except ValueError:
+            pass
+    return value
+
+
+def slot_names(fields):
+    """Map field names to attribute names, renaming those that are not identifiers"""
+    slots = {}
+    for position, field in enumerate(fields):
+        slot = field
+        if not field.isidentifier() or keyword.iskeyword(field) or field.startswith('__'):
+            slot = f'_{position}'
+        while slot in slots.values() or (slot != field and slot in fields):
+            slot = '_' + slot
+        slots[field] = slot
+    return slots
+
+
+class Dataset:
+    """Rows held as __slots__ records, with an id index and equality indexes.
+
+    Records are only appended while loading; a reload builds a new
+    Dataset, so readers can iterate without locking. Fields keep their
+    original names (a CSV header like "unit price"); self.slots maps them
+    to the record attributes.
+    """
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = tuple(str(field) for field in fields)
+        self.slots = slot_names(self.fields)
+        self.record_class = type(name + 'Record', (), {'__slots__': tuple(self.slots.values())})
+        self.records = []
+        self.by_id = {}
+        self.indexes = {}
+        self.types = {}
+        self.aggregates = AGGREGATES.get(name, {})
+        self.totals = dict.fromkeys(self.aggregates, 0)
+
+    def add(self, row):
+        """Append one row (a dict), updating the id index and running totals"""
+        record = self.record_class()
+        for field, slot in self.slots.items():
+            value = row.get(field)
+            setattr(record, slot, value)
+            if value is not None and field not in self.types:
+                self.types[field] = type(value)
+        if row.get('id') is not None:
+            self.by_id[row['id']] = len(self.records)
+        self.records.append(record)
+        for key, measure in self.aggregates.items():
+            self.totals[key] += measure(record)
+
+    def build_indexes(self):
+        """Index low-cardinality fields by value for equality filters"""
+        self.indexes = {}
+        for field, slot in self.slots.items():
+            if field == 'id':
+                continue
+            index = {}
+            for position, record in enumerate(self.records):
+                index.setdefault(getattr(record, slot), []).append(position)
+                if len(index) > INDEX_MAX_DISTINCT:
+                    break
+            else:
+                self.indexes[field] = index
+
+    @classmethod
+    def from_rows(cls, name, rows):
+        """Build an indexed dataset; fields are taken from the first row"""
+        dataset = None
+        for row in rows:
+            if dataset is None:
+                dataset = cls(name, row.keys())
+            dataset.add(row)
+        dataset = dataset or cls(name, ['id'])
+        dataset.build_indexes()
+        return dataset
+
+    def matches(self, filters, cursor):
+        """Yield (position, record) for records matching every filter from cursor on"""
+        positions = range(cursor, len(self.records))
+        for field, op, value in filters:
+            if op == '=' and field in self.indexes:
+                candidates = self.indexes[field].get(value, [])
+                candidates = candidates[bisect_left(candidates, cursor):]
+                if len(candidates) < len(positions):
+                    positions = candidates
+            elif op == '=' and field == 'id':
+                position = self.by_id.get(value)
+                positions = [position] if position is not None and position >= cursor else []
+        records = self.records
+        tests = [(FILTER_OPERATORS[op], self.slots[field], value) for field, op, value in filters]
+        for position in positions:
+            record = records[position]
+            try:
+                if all(test(getattr(record, slot), value) for test, slot, value in tests):
+                    yield position, record
+            except TypeError:
+                continue  # missing value or mismatched type never matches
+
+    def project(self, record, fields):
+        return {field: getattr(record, self.slots[field]) for field in fields}
+
+
+def load_dataset(name, path):
+    """Stream a .jsonl or .csv file into a Dataset"""
+    with open(path, newline='') as f:
+        if path.endswith('.csv'):
+            rows = ({key: coerce(value) for key, value in row.items()}
+                    for row in csv.DictReader(f))
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        return Dataset.from_rows(name, rows)
+
+
+DATASETS = {
+    name: Dataset.from_rows(name, SAMPLE_DATA["data"].pop(name))
+    for name in ('users', 'products')
+}
+DATA_UPDATED = datetime.now().isoformat()
+
+
+def current_stats():
+    """Stats from the datasets' running totals"""
+    products = DATASETS['products']
+    return {
+        "total_users": len(DATASETS['users'].records),
+        "total_products": len(products.records),
+        "total_revenue": round(products.totals.get('total_revenue', 0), 2),
+        "last_updated": DATA_UPDATED,
+    }
+
+
+def parse_query(query):
+    """Split a query string into parameters and (field, op, value) filters.
+
+    A part without an operator becomes (part, None, None); it is only an
+    error if it names a field of the dataset queried.
+    """
+    params, filters = {}, []
+    for part in query.split('&'):
+        part = unquote_plus(part)
+        if not part:
+            continue
+        match = FILTER_PATTERN.match(part)
+        if not match:
+            filters.append((part, None, None))
+            continue
+        field, op, value = match.groups()
+        if field in QUERY_PARAMS and op == '=':
+            params[field] = value
+        else:
+            filters.append((field, op, value))
+    return params, filters
+
+
+def dataset_query(dataset, params, filters):
+    """Validate a dataset query; returns (filters, fields, cursor, limit)"""
+    typed = []
+    for field, op, value in filters:
+        if op is None:
+            raise QueryError(f"Malformed filter: {field}")
+        # A column's values may mix ints and floats, so numbers are
+        # compared as whatever they parse as rather than the first row's type
+        if dataset.types.get(field) in (int, float):
+            number = coerce(value)
+            if not isinstance(number, (int, float)):
+                raise QueryError(f"Bad value for {field}: {value}")
+            value = number
+        typed.append((field, op, value))
+    fields = dataset.fields
+    if params.get('fields'):
+        fields = tuple(params['fields'].split(','))
+        unknown = [field for field in fields if field not in dataset.fields]
+        if unknown:
+            raise QueryError(f"Unknown field: {unknown[0]}")
+    try:
+        cursor = int(params.get('cursor', 0))
+        limit = int(params['limit']) if 'limit' in params else None
+    except ValueError:
+        raise QueryError("cursor and limit must be integers")
+    if cursor < 0 or (limit is not None and limit < 1):
+        raise QueryError("cursor must be >= 0 and limit >= 1")
+    return typed, fields, cursor, limit
+
+
+def page_document(dataset, filters=(), fields=None, cursor=0, limit=DEFAULT_PAGE_SIZE):
+    """One page of matches plus the cursor for the next page (None when done)"""
+    fields = fields or dataset.fields
+    page, next_cursor = [], None
+    for position, record in dataset.matches(filters, cursor):
+        if len(page) == limit:
+            next_cursor = str(position)
+            break
+        page.append(dataset.project(record, fields))
+    return {dataset.name: page, "next_cursor": next_cursor}
+
+
+def stream_ndjson(dataset, filters, fields, cursor, limit):
+    """Yield NDJSON in chunks of about STREAM_CHUNK_BYTES"""
+    chunk, size, sent = [], 0, 0
+    for position, record in dataset.matches(filters, cursor):
+        if limit is not None and sent == limit:
+            break
+        line = json.dumps(dataset.project(record, fields), separators=(',', ':')) + '\n'
+        chunk.append(line)
+        size += len(line)
+        sent += 1
+        if size >= STREAM_CHUNK_BYTES:
+            yield ''.join(chunk).encode()
+            chunk, size = [], 0
+    if chunk:
+        yield ''.join(chunk).encode()
+
+
+# Pre-serialized responses. Payloads are built once per data version
+# instead of per request; the volatile timestamp travels in a header.
+Payload = namedtuple('Payload', 'body gzip etag')
+
+ENDPOINTS = {
+    'users': lambda: page_document(DATASETS['users']),
+    'products': lambda: page_document(DATASETS['products']),
+    'stats': lambda: {"stats": current_stats()},
+    'vpc_info': lambda: {"vpc_info": SAMPLE_DATA["vpc_info"]},
+}
+
+DATA_LOCK = threading.Lock()
+data_version = 0
+payload_cache = (None, {})  # (data version, payloads), swapped as one tuple
+
+
+def make_payload(document):
+    """Serialize a document to compact JSON with a gzip variant and an ETag"""
+    body = json.dumps(document, separators=(',', ':')).encode()
+    compressed = gzip.compress(body, mtime=0)
+    etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+    return Payload(body, compressed if len(compressed) < len(body) else None, etag)
+
+
+def full_document():
+    """The whole API document, with the first page of each dataset"""
+    data = {name: page_document(dataset)[name] for name, dataset in DATASETS.items()}
+    data["stats"] = current_stats()
+    return dict(SAMPLE_DATA, data=data)
+
+
+def update_data(section, value):
+    """Replace a dataset (a Dataset or a list of row dicts) and invalidate the cached payloads"""
+    global data_version, DATA_UPDATED
+    if not isinstance(value, Dataset):
+        value = Dataset.from_rows(section, value)
+    with DATA_LOCK:
+        DATASETS[section] = value
+        DATA_UPDATED = datetime.now().isoformat()
+        data_version += 1
+
+
+def get_payloads():
+    """Return the payloads for the current data version, rebuilding if stale"""
+    global payload_cache
+    version, payloads = payload_cache
+    if version == data_version:
+        return payloads
+    with DATA_LOCK:
+        version, payloads = payload_cache
+        if version != data_version:
+            payloads = {name: make_payload(build()) for name, build in ENDPOINTS.items()}
+            payloads[None] = make_payload(full_document())
+            payload_cache = (data_version, payloads)
+    return payloads
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows gzip"""
+    for coding in accept_encoding.split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() not in ('gzip', 'x-gzip', '*'):
+            continue
+        params = params.replace(' ', '')
+        if not params.startswith('q='):
+            return True
+        try:
+            return float(params[2:]) > 0
+        except ValueError:
+            return False
+    return False
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of If-None-Match against an ETag and its gzip form"""
+    if if_none_match.strip() == '*':
+        return True
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag in (etag, etag[:-1] + '-gzip"'):
+            return True
+    return False
+
+
+def json_headers():
+    """Headers shared by JSON responses"""
+    return [
+        ('Content-type', 'application/json'),
+        ('Cache-Control', 'no-cache'),
+        ('Vary', 'Accept-Encoding'),
+        ('X-Timestamp', datetime.now().isoformat()),
+    ] + CORS_HEADERS
+
+
+def error_response(error):
+    """A 400 response describing a bad query"""
+    body = json.dumps({"error": str(error)}).encode()
+    return 400, [('Content-type', 'application/json')] + CORS_HEADERS, body
+
+
+def handle_dataset_query(dataset, params, filters, headers):
+    """Answer a paginated, projected or filtered dataset request"""
+    try:
+        filters, fields, cursor, limit = dataset_query(dataset, params, filters)
+    except QueryError as e:
+        return error_response(e)
+    response_headers = json_headers()
+    if params.get('format') == 'ndjson':
+        response_headers[0] = ('Content-type', 'application/x-ndjson')
+        return 200, response_headers, stream_ndjson(dataset, filters, fields, cursor, limit)
+
+    limit = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    document = page_document(dataset, filters, fields, cursor, limit)
+    body = json.dumps(document, separators=(',', ':')).encode()
+    if len(body) > 1024 and accepts_gzip(headers.get('accept-encoding', '')):
+        body = gzip.compress(body, compresslevel=5)
+        response_headers.append(('Content-Encoding', 'gzip'))
+    return 200, response_headers, body
+
+
+def handle_request(method, target, headers):
+    """Build the response for a request as (status, headers, body).
+
+    body is bytes, or an iterator of byte chunks to be sent chunked.
+    """
+    if method == 'OPTIONS':
+        return 200, CORS_HEADERS, b''
+    if method not in ('GET', 'HEAD'):
+        return 501, [('Content-type', 'text/plain')], b'Unsupported method'
+
+    # Allow query parameters to filter data
+    params, filters = parse_query(urlparse(target).query)
+    endpoint = params.get('endpoint')
+    if endpoint in DATASETS:
+        dataset = DATASETS[endpoint]
+        # Parameters naming no field (cache busters like _=123) are ignored
+        filters = [query for query in filters if query[0] in dataset.fields]
+        if filters or set(params) - {'endpoint'}:
+            return handle_dataset_query(dataset, params, filters, headers)
+
+    payloads = get_payloads()
+    payload = payloads.get(endpoint) or payloads[None]
+    response_headers = json_headers()
+    body, etag = payload.body, payload.etag
+    if payload.gzip is not None and accepts_gzip(headers.get('accept-encoding', '')):
+        body, etag = payload.gzip, etag[:-1] + '-gzip"'
+        response_headers.append(('Content-Encoding', 'gzip'))
+    response_headers.append(('ETag', etag))
+
+    if etag_matches(headers.get('if-none-match', ''), payload.etag):
+        return 304, response_headers, b''
+    return 200, response_headers, body
+
+
+def log(message):
+    """Log a line with a timestamp (one write, so threads don't interleave)"""
+    sys.stdout.write(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}\n")
+
+
+class BackendAPIHandler(http.server.BaseHTTPRequestHandler):
+    """HTTP/1.1 handler that serves the JSON API over persistent connections"""
+
+    protocol_version = 'HTTP/1.1'
+    timeout = REQUEST_TIMEOUT
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.parked = False
+        self.server.track(self.connection, busy=False)
+
+    def handle(self):
+        """Answer the requests that have arrived, then park the idle connection"""
+        self.close_connection = False
+        while not self.close_connection:
+            if not self.input_ready():
+                self.parked = True
+                return
+            self.handle_one_request()
+
+    def resume(self):
+        """Serve a parked connection whose next request has arrived"""
+        self.parked = False
+        try:
+            self.handle()
+        finally:
+            self.finish()
+
+    def input_ready(self):
+        """Whether the next request is buffered or readable, without blocking"""
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return True
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def finish(self):
+        # A parked connection stays open for the server's idle loop
+        if self.parked:
+            return
+        self.server.untrack(self.connection)
+        super().finish()
+
+    def parse_request(self):
+        # The request line has arrived; drain must not cut this connection now
+        self.server.track(self.connection, busy=True)
+        return super().parse_request()
+
+    def handle_one_request(self):
+        super().handle_one_request()
+        self.server.track(self.connection, busy=False)
+
+    def respond(self, send_body=True):
+        """Send the response for the current request with its Content-Length"""
+        status, headers, body = handle_request(self.command, self.path, self.headers)
+        streaming = not isinstance(body, bytes)
+        chunked = streaming and self.request_version == 'HTTP/1.1'
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        elif streaming:
+            # HTTP/1.0 has no chunked encoding; the end of the body is EOF
+            self.send_header('Connection', 'close')
+        elif status != 304:
+            self.send_header('Content-Length', str(len(body)))
+        if self.server.draining:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        if not send_body:
+            return
+        if not streaming:
+            self.wfile.write(body)
+            return
+        for chunk in body:
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk) if chunked else chunk)
+        if chunked:
+            self.wfile.write(b'0\r\n\r\n')
+
     def do_GET(self):
         """Handle GET requests"""
-        parsed_path = urlparse(self.path)
-        path = parsed_path.path
-        
-        # CORS headers for cross-origin requests
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        
-        # Update timestamp
-        SAMPLE_DATA["system_info"]["timestamp"] = datetime.now().isoformat()
-        SAMPLE_DATA["data"]["stats"]["last_updated"] = datetime.now().isoformat()
-        
-        # Serve JSON data
-        response_data = SAMPLE_DATA.copy()
-        
-        # Allow query parameters to filter data
-        query_params = parse_qs(parsed_path.query)
-        if 'endpoint' in query_params:
-            endpoint = query_params['endpoint'][0]
-            if endpoint == 'users':
-                response_data = {"users": SAMPLE_DATA["data"]["users"]}
-            elif endpoint == 'products':
-                response_data = {"products": SAMPLE_DATA["data"]["products"]}
-            elif endpoint == 'stats':
-                response_data = {"stats": SAMPLE_DATA["data"]["stats"]}
-            elif endpoint == 'vpc_info':
-                response_data = {"vpc_info": SAMPLE_DATA["vpc_info"]}
-        
-        json_response = json.dumps(response_data, indent=2)
-        self.wfile.write(json_response.encode())
-    
+        self.respond()
+
+    def do_HEAD(self):
+        """Handle HEAD requests"""
+        self.respond(send_body=False)
+
     def do_OPTIONS(self):
         """Handle OPTIONS requests for CORS"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-    
+        self.respond()
+
     def log_message(self, format, *args):
         """Log requests"""
-        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {args[0]} {args[1]} {args[2]}")
+        log(format % args)
+
+
+# Threaded mode
+
+class PooledHTTPServer(socketserver.TCPServer):
+    """TCP server that hands connections to a fixed pool of worker threads.
+
+    A worker holds a connection only while it has a request to answer: an
+    idle keep-alive connection is parked in a selector and queued again
+    when its next request arrives, so silent clients cannot pin workers.
+    When every worker is busy the accept loop blocks, so further clients
+    wait in the kernel listen backlog instead of spawning more threads.
+    """
+
+    allow_reuse_address = True
+    request_queue_size = LISTEN_BACKLOG
+
+    def __init__(self, server_address, handler_class, threads, reuse_port=False):
+        self.reuse_port = reuse_port
+        self.draining = False
+        self.connections = {}
+        self.lock = threading.Lock()
+        self.pending = queue.Queue(maxsize=threads)
+        self.parking = queue.SimpleQueue()
+        self.parked = {}  # handler -> when it is closed for being idle
+        self.selector = selectors.DefaultSelector()
+        self.wakeup, self.wakeup_send = socket.socketpair()
+        self.selector.register(self.wakeup, selectors.EVENT_READ)
+        super().__init__(server_address, handler_class)
+        self.workers = [threading.Thread(target=self.worker, daemon=True)
+                        for _ in range(threads)]
+        for thread in self.workers:
+            thread.start()
+        threading.Thread(target=self.idle_loop, daemon=True).start()
+
+    def server_bind(self):
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+    def process_request(self, request, client_address):
+        self.pending.put((request, client_address, None))
+
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def worker(self):
+        """Serve queued connections until handed the stop sentinel"""
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            request, client_address, handler = item
+            try:
+                if handler is None:
+                    handler = self.finish_request(request, client_address)
+                else:
+                    handler.resume()
+            except Exception:
+                handler = None
+                self.handle_error(request, client_address)
+            if handler is not None and handler.parked:
+                self.parking.put(handler)
+                self.wakeup_send.send(b'\0')
+            else:
+                self.shutdown_request(request)
+
+    def idle_loop(self):
+        """Queue parked connections again when their next request arrives"""
+        while True:
+            for key, _ in self.selector.select(timeout=1):
+                if key.fileobj is self.wakeup:
+                    self.wakeup.recv(4096)
+                    continue
+                handler = key.data
+                self.selector.unregister(handler.connection)
+                del self.parked[handler]
+                if self.draining:
+                    self.close_parked(handler)
+                else:
+                    self.pending.put((handler.request, handler.client_address, handler))
+            while not self.parking.empty():
+                handler = self.parking.get()
+                self.selector.register(handler.connection, selectors.EVENT_READ, handler)
+                self.parked[handler] = time.monotonic() + handler.timeout
+            now = time.monotonic()
+            for handler, deadline in list(self.parked.items()):
+                if self.draining or deadline <= now:
+                    self.selector.unregister(handler.connection)
+                    del self.parked[handler]
+                    self.close_parked(handler)
+
+    def close_parked(self, handler):
+        handler.parked = False
+        handler.finish()
+        self.shutdown_request(handler.request)
+
+    def track(self, connection, busy):
+        with self.lock:
+            self.connections[connection] = busy
+        if self.draining and not busy:
+            self.close_idle()
+
+    def untrack(self, connection):
+        with self.lock:
+            self.connections.pop(connection, None)
+
+    def close_idle(self):
+        """End keep-alive connections that are waiting for their next request"""
+        with self.lock:
+            idle = [conn for conn, busy in self.connections.items() if not busy]
+        for conn in idle:
+            try:
+                conn.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+
+    def drain(self, timeout):
+        """Stop accepting, then let in-flight requests finish within the timeout"""
+        self.draining = True
+        self.wakeup_send.send(b'\0')
+        self.close_idle()
+        self.shutdown()
+        self.server_close()
+        for _ in self.workers:
+            self.pending.put(None)
+        deadline = time.monotonic() + timeout
+        for thread in self.workers:
+            thread.join(max(0, deadline - time.monotonic()))
+
+
+def serve_threaded(port, reuse_port):
+    """Serve with a bounded thread pool until SIGTERM or SIGINT"""
+    httpd = PooledHTTPServer(("", port), BackendAPIHandler, THREADS, reuse_port)
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    stop.wait()
+    httpd.drain(DRAIN_TIMEOUT)
+
+
+# Asyncio mode
+
+class AsyncHTTPServer:
+    """Minimal HTTP/1.1 keep-alive server on asyncio streams"""
+
+    def __init__(self):
+        self.draining = False
+        self.connections = {}
+
+    async def handle_connection(self, reader, writer):
+        self.connections[writer] = False
+        try:
+            while not self.draining:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), REQUEST_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                        asyncio.TimeoutError, ConnectionError):
+                    break
+                self.connections[writer] = True
+                if not await self.handle_request(head, reader, writer):
+                    break
+                self.connections[writer] = False
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            self.connections.pop(writer, None)
+            writer.close()
+
+    async def handle_request(self, head, reader, writer):
+        """Answer one request; returns whether the connection stays open"""
+        lines = head.decode('latin-1').split('\r\n')
+        requestline = lines[0]
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(':')
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        try:
+            method, target, version = requestline.split()
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            method, version = None, 'HTTP/1.0'
+        if method is None or length < 0 or 'transfer-encoding' in headers:
+            status, response_headers, body = 400, [('Content-type', 'text/plain')], b'Bad request'
+            keep_alive = False
+        else:
+            if length:
+                await asyncio.wait_for(reader.readexactly(length), REQUEST_TIMEOUT)
+            status, response_headers, body = handle_request(method, target, headers)
+            connection = headers.get('connection', '').lower()
+            if version == 'HTTP/1.1':
+                keep_alive = connection != 'close'
+            else:
+                keep_alive = connection == 'keep-alive'
+        streaming = not isinstance(body, bytes)
+        chunked = streaming and version == 'HTTP/1.1'
+        keep_alive = keep_alive and not self.draining and (chunked or not streaming)
+
+        out = [f'HTTP/1.1 {status} {HTTPStatus(status).phrase}',
+               f'Date: {formatdate(usegmt=True)}']
+        if chunked:
+            out.append('Transfer-Encoding: chunked')
+        elif not streaming and status != 304:
+            out.append(f'Content-Length: {len(body)}')
+        out += [f'{name}: {value}' for name, value in response_headers]
+        out.append('Connection: keep-alive' if keep_alive else 'Connection: close')
+        payload = ('\r\n'.join(out) + '\r\n\r\n').encode('latin-1')
+        if method == 'HEAD':
+            streaming = False
+        elif not streaming:
+            payload += body
+        writer.write(payload)
+        await asyncio.wait_for(writer.drain(), REQUEST_TIMEOUT)
+        if streaming:
+            # Wait for each chunk to drain so memory stays bounded by one chunk
+            for chunk in body:
+                writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk) if chunked else chunk)
+                await asyncio.wait_for(writer.drain(), REQUEST_TIMEOUT)
+            if chunked:
+                writer.write(b'0\r\n\r\n')
+                await asyncio.wait_for(writer.drain(), REQUEST_TIMEOUT)
+        log(f'"{requestline}" {status} {"-" if streaming else len(body)}')
+        return keep_alive
+
+    async def serve(self, port, reuse_port):
+        loop = asyncio.get_running_loop()
+        stop = loop.create_future()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, lambda: stop.done() or stop.set_result(None))
+        server = await asyncio.start_server(self.handle_connection, port=port,
+                                            reuse_address=True, reuse_port=reuse_port,
+                                            backlog=LISTEN_BACKLOG)
+        await stop
+
+        # Drain: stop listening, drop idle keep-alive connections, wait for the rest
+        server.close()
+        self.draining = True
+        deadline = loop.time() + DRAIN_TIMEOUT
+        while self.connections and loop.time() < deadline:
+            for writer, busy in list(self.connections.items()):
+                if not busy:
+                    writer.transport.abort()
+            await asyncio.sleep(0.05)
+        for writer in list(self.connections):
+            writer.transport.abort()
+
+
+def serve_asyncio(port, reuse_port):
+    """Serve on an asyncio event loop until SIGTERM or SIGINT"""
+    asyncio.run(AsyncHTTPServer().serve(port, reuse_port))
+
+
+def serve(port, reuse_port=False):
+    if SERVER_MODE == 'asyncio':
+        serve_asyncio(port, reuse_port)
+    else:
+        serve_threaded(port, reuse_port)
+
+
+def run_workers(port, count):
+    """Fork worker processes that share the port through SO_REUSEPORT.
+
+    The kernel spreads new connections across the workers. SIGTERM is
+    passed on so every worker drains; a worker that dies is replaced.
+    """
+    children = set()
+    stopping = False
+
+    def spawn():
+        sys.stdout.flush()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                serve(port, reuse_port=True)
+            finally:
+                sys.stdout.flush()
+                os._exit(0)
+        children.add(pid)
+
+    def forward(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for _ in range(count):
+        spawn()
+    while children:
+        pid, status = os.wait()
+        children.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited with status {status}, restarting")
+            time.sleep(1)
+            spawn()
 
 def main():
     """Start the API server"""
     PORT = int(os.environ.get('PORT', 9000))
     
-    with socketserver.TCPServer(("", PORT), BackendAPIHandler) as httpd:
-        print(f"Backend API server starting on port {PORT}")
-        print(f"VPC: {VPC_NAME}, Subnet: {SUBNET_NAME}, IP: {HOST_IP}")
-        print(f"API endpoint: http://{HOST_IP}:{PORT}/api")
-        httpd.serve_forever()
+    print(f"Backend API server starting on port {PORT}")
+    print(f"VPC: {VPC_NAME}, Subnet: {SUBNET_NAME}, IP: {HOST_IP}")
+    print(f"API endpoint: http://{HOST_IP}:{PORT}/api")
+    print(f"Mode: {SERVER_MODE}, workers: {WORKERS}")
+    for name, path in (('users', USERS_FILE), ('products', PRODUCTS_FILE)):
+        if path:
+            update_data(name, load_dataset(name, path))
+            print(f"Loaded {len(DATASETS[name].records)} {name} from {path}")
+    if WORKERS > 1:
+        run_workers(PORT, WORKERS)
+    else:
+        serve(PORT)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
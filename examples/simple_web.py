@@ -2,13 +2,40 @@
 """
 Simple web application for VPC demonstration
 Serves a simple HTML page showing VPC information
+
+Serving is tuned through environment variables:
+  SERVER_MODE      'threaded' (default) or 'asyncio'
+  WORKERS          processes sharing the port via SO_REUSEPORT ('auto' = one per CPU)
+  THREADS          worker threads per process in threaded mode (default 64)
+  REQUEST_TIMEOUT  seconds a connection may sit idle or stall mid-request (default 15)
+  DRAIN_TIMEOUT    seconds to finish in-flight requests after SIGTERM (default 10)
+
+/api/* is proxied to BACKEND_IP:BACKEND_PORT and /metrics reports proxy stats:
+  PROXY_POOL_SIZE          persistent backend connections per process (default 8)
+  PROXY_TIMEOUT            seconds for a backend connect, read or pool wait (default 3)
+  PROXY_CACHE_TTL          seconds a 200 response is reused; 0 disables (default 2)
+  PROXY_BREAKER_THRESHOLD  consecutive failures that open the breaker (default 5)
+  PROXY_BREAKER_COOLDOWN   seconds before an open breaker lets a probe through (default 10)
 """
 
+import http.client
 import http.server
 import socketserver
 import socket
+import selectors
 import os
+import sys
 import json
+import gzip
+import time
+import hashlib
+import queue
+import signal
+import asyncio
+import threading
+from collections import namedtuple
+from email.utils import formatdate
+from http import HTTPStatus
 from datetime import datetime
 from pathlib import Path
 
@@ -41,14 +68,30 @@ try:
 except:
     HOSTNAME = 'Unknown'
 
-# HTML template
-HTML_TEMPLATE = """<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>VPC Web Application Dashboard</title>
-    <style>
+
+def env_int(name, default, minimum=1):
+    """Read a positive integer setting, falling back to the default"""
+    try:
+        value = int(os.environ.get(name, default))
+    except (ValueError, TypeError):
+        return default
+    return value if value >= minimum else default
+
+
+# Serving configuration
+SERVER_MODE = os.environ.get('SERVER_MODE', 'threaded')
+if os.environ.get('WORKERS') == 'auto':
+    WORKERS = os.cpu_count() or 1
+else:
+    WORKERS = env_int('WORKERS', 1)
+THREADS = env_int('THREADS', 64)
+REQUEST_TIMEOUT = env_int('REQUEST_TIMEOUT', 15)
+DRAIN_TIMEOUT = env_int('DRAIN_TIMEOUT', 10, minimum=0)
+LISTEN_BACKLOG = 1024
+
+# Page templates. They are rendered once at startup (see build_routes); the
+# stylesheet and script are served as fingerprinted, long-cached assets.
+CSS_TEMPLATE = """
         * {{
             margin: 0;
             padding: 0;
@@ -250,117 +293,10 @@ HTML_TEMPLATE = """<!DOCTYPE html>
             background: #2196F3;
             color: white;
         }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🌐 VPC Web Application Dashboard</h1>
-            <p>Frontend running in Public Subnet | Backend API in Private Subnet</p>
-        </div>
-        
-        <div class="grid">
-            <!-- Frontend VPC Information -->
-            <div class="card">
-                <h2>🖥️ Frontend VPC Info</h2>
-                <div class="info-row">
-                    <span class="info-label">VPC Name:</span>
-                    <span class="info-value">{vpc_name}</span>
-                </div>
-                <div class="info-row">
-                    <span class="info-label">Subnet:</span>
-                    <span class="info-value">{subnet_name} <span class="badge badge-public">PUBLIC</span></span>
-                </div>
-                <div class="info-row">
-                    <span class="info-label">Host IP:</span>
-                    <span class="info-value">{host_ip}</span>
-                </div>
-                <div class="info-row">
-                    <span class="info-label">Namespace:</span>
-                    <span class="info-value">{namespace}</span>
-                </div>
-                <div class="info-row">
-                    <span class="info-label">Hostname:</span>
-                    <span class="info-value">{hostname}</span>
-                </div>
-                <div style="margin-top: 15px;">
-                    <span class="status-badge status-running">✅ Running</span>
-                </div>
-            </div>
-            
-            <!-- Backend Connection Info -->
-            <div class="card">
-                <h2>🔗 Backend API Connection</h2>
-                <div class="info-row">
-                    <span class="info-label">Backend URL:</span>
-                    <span class="info-value">http://{backend_ip}:{backend_port}</span>
-                </div>
-                <div id="backend-status" class="loading">Loading backend data...</div>
-                <button onclick="fetchBackendData()">🔄 Refresh Data</button>
-                <div id="backend-error" class="error" style="display: none;"></div>
-            </div>
-            
-            <!-- Backend VPC Information (populated by JavaScript) -->
-            <div class="card" id="backend-vpc-card" style="display: none;">
-                <h2>🔒 Backend VPC Info</h2>
-                <div id="backend-vpc-content"></div>
-            </div>
-            
-            <!-- Statistics (populated by JavaScript) -->
-            <div class="card" id="stats-card" style="display: none;">
-                <h2>📊 Statistics</h2>
-                <div class="stats-grid" id="stats-grid"></div>
-            </div>
-        </div>
-        
-        <!-- Backend Data Section -->
-        <div class="card backend-section" id="backend-data-section" style="display: none;">
-            <h2>📦 Backend API Data</h2>
-            
-            <!-- Users Table -->
-            <div id="users-section" style="display: none;">
-                <h3>👥 Users</h3>
-                <div class="table-container">
-                    <table id="users-table">
-                        <thead>
-                            <tr>
-                                <th>ID</th>
-                                <th>Name</th>
-                                <th>Email</th>
-                                <th>Role</th>
-                            </tr>
-                        </thead>
-                        <tbody id="users-tbody"></tbody>
-                    </table>
-                </div>
-            </div>
-            
-            <!-- Products Table -->
-            <div id="products-section" style="display: none;">
-                <h3>🛍️ Products</h3>
-                <div class="table-container">
-                    <table id="products-table">
-                        <thead>
-                            <tr>
-                                <th>ID</th>
-                                <th>Name</th>
-                                <th>Price</th>
-                                <th>Stock</th>
-                            </tr>
-                        </thead>
-                        <tbody id="products-tbody"></tbody>
-                    </table>
-                </div>
-            </div>
-        </div>
-        
-        <div class="footer">
-            <p>Deployed at: {timestamp} | Raw JSON available in browser console (F12)</p>
-        </div>
-    </div>
-    
-    <script>
-        const BACKEND_URL = 'http://{backend_ip}:{backend_port}';
+"""
+
+SCRIPT_TEMPLATE = """
+        const BACKEND_URL = '/api/';
         
         // Fetch data from backend API
         async function fetchBackendData() {{
@@ -494,65 +430,953 @@ HTML_TEMPLATE = """<!DOCTYPE html>
         window.addEventListener('DOMContentLoaded', function() {{
             fetchBackendData();
         }});
-    </script>
+"""
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>VPC Web Application Dashboard</title>
+    <link rel="stylesheet" href="{css_url}">
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🌐 VPC Web Application Dashboard</h1>
+            <p>Frontend running in Public Subnet | Backend API in Private Subnet</p>
+        </div>
+        
+        <div class="grid">
+            <!-- Frontend VPC Information -->
+            <div class="card">
+                <h2>🖥️ Frontend VPC Info</h2>
+                <div class="info-row">
+                    <span class="info-label">VPC Name:</span>
+                    <span class="info-value">{vpc_name}</span>
+                </div>
+                <div class="info-row">
+                    <span class="info-label">Subnet:</span>
+                    <span class="info-value">{subnet_name} <span class="badge badge-public">PUBLIC</span></span>
+                </div>
+                <div class="info-row">
+                    <span class="info-label">Host IP:</span>
+                    <span class="info-value">{host_ip}</span>
+                </div>
+                <div class="info-row">
+                    <span class="info-label">Namespace:</span>
+                    <span class="info-value">{namespace}</span>
+                </div>
+                <div class="info-row">
+                    <span class="info-label">Hostname:</span>
+                    <span class="info-value">{hostname}</span>
+                </div>
+                <div style="margin-top: 15px;">
+                    <span class="status-badge status-running">✅ Running</span>
+                </div>
+            </div>
+            
+            <!-- Backend Connection Info -->
+            <div class="card">
+                <h2>🔗 Backend API Connection</h2>
+                <div class="info-row">
+                    <span class="info-label">Backend URL:</span>
+                    <span class="info-value">http://{backend_ip}:{backend_port} (via /api/)</span>
+                </div>
+                <div id="backend-status" class="loading">Loading backend data...</div>
+                <button onclick="fetchBackendData()">🔄 Refresh Data</button>
+                <div id="backend-error" class="error" style="display: none;"></div>
+            </div>
+            
+            <!-- Backend VPC Information (populated by JavaScript) -->
+            <div class="card" id="backend-vpc-card" style="display: none;">
+                <h2>🔒 Backend VPC Info</h2>
+                <div id="backend-vpc-content"></div>
+            </div>
+            
+            <!-- Statistics (populated by JavaScript) -->
+            <div class="card" id="stats-card" style="display: none;">
+                <h2>📊 Statistics</h2>
+                <div class="stats-grid" id="stats-grid"></div>
+            </div>
+        </div>
+        
+        <!-- Backend Data Section -->
+        <div class="card backend-section" id="backend-data-section" style="display: none;">
+            <h2>📦 Backend API Data</h2>
+            
+            <!-- Users Table -->
+            <div id="users-section" style="display: none;">
+                <h3>👥 Users</h3>
+                <div class="table-container">
+                    <table id="users-table">
+                        <thead>
+                            <tr>
+                                <th>ID</th>
+                                <th>Name</th>
+                                <th>Email</th>
+                                <th>Role</th>
+                            </tr>
+                        </thead>
+                        <tbody id="users-tbody"></tbody>
+                    </table>
+                </div>
+            </div>
+            
+            <!-- Products Table -->
+            <div id="products-section" style="display: none;">
+                <h3>🛍️ Products</h3>
+                <div class="table-container">
+                    <table id="products-table">
+                        <thead>
+                            <tr>
+                                <th>ID</th>
+                                <th>Name</th>
+                                <th>Price</th>
+                                <th>Stock</th>
+                            </tr>
+                        </thead>
+                        <tbody id="products-tbody"></tbody>
+                    </table>
+                </div>
+            </div>
+        </div>
+        
+        <div class="footer">
+            <p>Deployed at: {timestamp} | Raw JSON available in browser console (F12)</p>
+        </div>
+    </div>
+    
+    <script src="{script_url}"></script>
 </body>
 </html>
 """
 
-class VPCWebHandler(http.server.SimpleHTTPRequestHandler):
-    """Custom HTTP handler that serves VPC information"""
-    
+# Pre-rendered responses, keyed by path. Serving a request is a dict
+# lookup; the per-request time travels in the X-Timestamp header.
+Payload = namedtuple('Payload', 'status headers body gzip etag')
+
+NOT_FOUND = Payload(404, [('Content-type', 'text/html')], b'404 - Not Found', None, None)
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def make_payload(content_type, body, cache_control, status=200):
+    """Wrap rendered bytes with a gzip variant (when smaller) and an ETag"""
+    compressed = gzip.compress(body, mtime=0)
+    etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+    headers = [('Content-type', content_type),
+               ('Cache-Control', cache_control),
+               ('Vary', 'Accept-Encoding')]
+    return Payload(status, headers, body,
+                   compressed if len(compressed) < len(body) else None, etag)
+
+
+def build_routes():
+    """Render the page and its assets once; returns {path: Payload}"""
+    try:
+        css = CSS_TEMPLATE.format().encode()
+        script = SCRIPT_TEMPLATE.format().encode()
+        css_path = f"/static/app.{hashlib.sha1(css).hexdigest()[:12]}.css"
+        script_path = f"/static/app.{hashlib.sha1(script).hexdigest()[:12]}.js"
+        # Format the HTML template with all variables
+        # Ensure all values are strings and properly formatted
+        html = HTML_TEMPLATE.format(
+            vpc_name=str(VPC_NAME),
+            subnet_name=str(SUBNET_NAME),
+            host_ip=str(HOST_IP),
+            namespace=str(NAMESPACE),
+            hostname=str(HOSTNAME),
+            backend_ip=str(BACKEND_IP),
+            backend_port=str(BACKEND_PORT),  # Ensure it's a string
+            timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            css_url=css_path,
+            script_url=script_path,
+        )
+    except KeyError as e:
+        # If template formatting fails, serve the error message instead
+        error_msg = f"Template formatting error: Missing key {e}. BACKEND_IP={BACKEND_IP}, BACKEND_PORT={BACKEND_PORT}"
+        page = make_payload('text/plain', error_msg.encode(), 'no-store', status=500)
+        return {'/': page, '/index.html': page}
+    except Exception as e:
+        # Catch any other errors
+        error_msg = f"Error generating HTML: {e}. BACKEND_IP={BACKEND_IP}, BACKEND_PORT={BACKEND_PORT}"
+        page = make_payload('text/plain', error_msg.encode(), 'no-store', status=500)
+        return {'/': page, '/index.html': page}
+
+    page = make_payload('text/html; charset=utf-8', html.encode(), 'no-cache')
+    return {
+        '/': page,
+        '/index.html': page,
+        css_path: make_payload('text/css; charset=utf-8', css, ASSET_CACHE_CONTROL),
+        script_path: make_payload('application/javascript; charset=utf-8', script, ASSET_CACHE_CONTROL),
+    }
+
+
+ROUTES = build_routes()
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows gzip"""
+    for coding in accept_encoding.split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() not in ('gzip', 'x-gzip', '*'):
+            continue
+        params = params.replace(' ', '')
+        if not params.startswith('q='):
+            return True
+        try:
+            return float(params[2:]) > 0
+        except ValueError:
+            return False
+    return False
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of If-None-Match against an ETag and its gzip form"""
+    if if_none_match.strip() == '*':
+        return True
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag in (etag, etag[:-1] + '-gzip"'):
+            return True
+    return False
+
+
+# Backend proxy. /api/* is forwarded to BACKEND_IP:BACKEND_PORT so the
+# browser talks only to this origin and never needs a route to the
+# private subnet.
+PROXY_PREFIX = '/api'
+PROXY_POOL_SIZE = env_int('PROXY_POOL_SIZE', 8)
+PROXY_TIMEOUT = env_int('PROXY_TIMEOUT', 3)
+PROXY_CACHE_TTL = env_int('PROXY_CACHE_TTL', 2, minimum=0)
+PROXY_STALE_TTL = 30  # how long an expired entry may stand in while the backend fails
+PROXY_CACHE_ENTRIES = 1024
+PROXY_MAX_BODY = 16 * 1024 * 1024
+BREAKER_THRESHOLD = env_int('PROXY_BREAKER_THRESHOLD', 5)
+BREAKER_COOLDOWN = env_int('PROXY_BREAKER_COOLDOWN', 10)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+PASSTHROUGH_HEADERS = ('content-type', 'content-encoding', 'etag', 'x-timestamp')
+
+CachedResponse = namedtuple('CachedResponse', 'status headers body fresh_until stale_until')
+
+
+class ProxyError(Exception):
+    """The backend could not be reached; carries the status to answer with"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class CircuitOpen(ProxyError):
+    """The circuit breaker is refusing backend calls"""
+
+    def __init__(self):
+        super().__init__(503, "Backend unavailable (circuit open)")
+
+
+class Histogram:
+    """Cumulative latency histogram in the Prometheus layout"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+    def render(self, name):
+        lines = [f'{name}_bucket{{le="{bound}"}} {count}'
+                 for bound, count in zip(self.buckets, self.counts)]
+        lines += [f'{name}_bucket{{le="+Inf"}} {self.total}',
+                  f'{name}_sum {self.sum:.6f}',
+                  f'{name}_count {self.total}']
+        return lines
+
+
+class CircuitBreaker:
+    """Stop calling a failing backend for a cooldown, then let one probe through"""
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.probing or time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.probing = True
+            return True
+
+    def record(self, ok):
+        """Note a call's outcome; None when it says nothing about the backend"""
+        with self.lock:
+            self.probing = False
+            if ok is None:
+                return
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.failures >= self.threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+class ConnectionPool:
+    """At most `size` persistent HTTP/1.1 connections to one backend"""
+
+    def __init__(self, host, port, size, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(size)
+        self.idle = []
+        self.lock = threading.Lock()
+        self.busy = 0
+
+    def request(self, path, headers):
+        """GET path; returns (status, headers, body) or raises ProxyError"""
+        if not self.slots.acquire(timeout=self.timeout):
+            raise ProxyError(503, "Backend connection pool exhausted")
+        with self.lock:
+            self.busy += 1
+        try:
+            # A pooled connection may have been closed by the backend while
+            # idle; a GET is safe to retry once on a fresh connection.
+            for attempt in (0, 1):
+                with self.lock:
+                    conn = self.idle.pop() if self.idle else None
+                reused = conn is not None
+                if conn is None:
+                    conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                try:
+                    conn.request('GET', path, headers=headers)
+                    response = conn.getresponse()
+                    body = response.read(PROXY_MAX_BODY + 1)
+                except (http.client.InvalidURL, UnicodeError) as e:
+                    # Refused before anything was sent; not the backend's fault
+                    conn.close()
+                    raise ProxyError(400, f"Invalid request path: {e}")
+                except ConnectionError as e:
+                    conn.close()
+                    if reused and attempt == 0:
+                        continue
+                    raise ProxyError(502, f"Backend connection failed: {e}")
+                except TimeoutError:
+                    conn.close()
+                    raise ProxyError(504, "Backend timed out")
+                except (OSError, http.client.HTTPException) as e:
+                    conn.close()
+                    raise ProxyError(502, f"Backend error: {e}")
+                if len(body) > PROXY_MAX_BODY:
+                    conn.close()
+                    raise ProxyError(502, "Backend response too large to proxy")
+                if response.will_close:
+                    conn.close()
+                else:
+                    with self.lock:
+                        self.idle.append(conn)
+                return response.status, response.getheaders(), body
+        finally:
+            with self.lock:
+                self.busy -= 1
+            self.slots.release()
+
+    def counts(self):
+        with self.lock:
+            return len(self.idle), self.busy
+
+
+class Call:
+    """One in-flight backend request that concurrent callers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class BackendProxy:
+    """Pooled, cached, coalescing proxy to the backend API with a circuit breaker"""
+
+    def __init__(self, host, port):
+        self.pool = ConnectionPool(host, port, PROXY_POOL_SIZE, PROXY_TIMEOUT)
+        self.breaker = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_COOLDOWN)
+        self.cache = {}
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.results = dict.fromkeys(('hit', 'miss', 'coalesced', 'stale', 'error', 'rejected'), 0)
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.backend_latency = Histogram(LATENCY_BUCKETS)
+
+    def count(self, result, started=None):
+        with self.lock:
+            self.results[result] += 1
+            if started is not None:
+                self.latency.observe(time.monotonic() - started)
+
+    def call_backend(self, path):
+        """One backend round trip through the breaker and the pool"""
+        if not self.breaker.allow():
+            raise CircuitOpen()
+        started = time.monotonic()
+        # Any exception must release a half-open probe, or the breaker stays open
+        ok = None
+        try:
+            status, headers, body = self.pool.request(path, {'Accept-Encoding': 'gzip'})
+            ok = status < 500
+        except ProxyError as e:
+            if e.status >= 500:
+                ok = False
+            raise
+        finally:
+            with self.lock:
+                self.backend_latency.observe(time.monotonic() - started)
+            self.breaker.record(ok)
+        headers = [(name, value) for name, value in headers
+                   if name.lower() in PASSTHROUGH_HEADERS]
+        now = time.monotonic()
+        return CachedResponse(status, headers, body,
+                              now + PROXY_CACHE_TTL, now + PROXY_CACHE_TTL + PROXY_STALE_TTL)
+
+    def store(self, path, response):
+        if response.status != 200 or not PROXY_CACHE_TTL:
+            return
+        with self.lock:
+            if path not in self.cache and len(self.cache) >= PROXY_CACHE_ENTRIES:
+                del self.cache[next(iter(self.cache))]
+            self.cache[path] = response
+
+    def fetch(self, path):
+        """Return (response, result) for path, sharing one backend call per path"""
+        with self.lock:
+            cached = self.cache.get(path)
+            if cached and cached.fresh_until > time.monotonic():
+                return cached, 'hit'
+            call = self.inflight.get(path)
+            leader = call is None
+            if leader:
+                call = self.inflight[path] = Call()
+        if not leader:
+            if not call.done.wait(PROXY_TIMEOUT * 3):
+                raise ProxyError(504, "Backend timed out")
+            if call.error:
+                raise call.error
+            return call.response, 'coalesced'
+        try:
+            call.response = self.call_backend(path)
+            self.store(path, call.response)
+            return call.response, 'miss'
+        except ProxyError as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.inflight[path]
+            call.done.set()
+
+    def stale(self, path):
+        with self.lock:
+            cached = self.cache.get(path)
+        if cached and cached.stale_until > time.monotonic():
+            return cached
+        return None
+
+    def handle(self, path, headers):
+        """Answer a proxied request as (status, headers, body)"""
+        started = time.monotonic()
+        try:
+            response, result = self.fetch(path)
+        except ProxyError as e:
+            response = self.stale(path)
+            if response is None:
+                self.count('rejected' if isinstance(e, CircuitOpen) else 'error', started)
+                body = json.dumps({"error": str(e)}).encode()
+                return e.status, [('Content-type', 'application/json'), ('X-Cache', 'ERROR')], body
+            result = 'stale'
+        self.count(result, started)
+
+        response_headers = [('Cache-Control', 'no-cache'), ('Vary', 'Accept-Encoding'),
+                            ('X-Cache', result.upper())]
+        body = response.body
+        gzipped = any(name.lower() == 'content-encoding' and value == 'gzip'
+                      for name, value in response.headers)
+        if gzipped and not accepts_gzip(headers.get('accept-encoding', '')):
+            body = gzip.decompress(body)
+            response_headers += [(name, value) for name, value in response.headers
+                                 if name.lower() in ('content-type', 'x-timestamp')]
+        else:
+            response_headers += response.headers
+        etag = next((value for name, value in response_headers if name.lower() == 'etag'), None)
+        if etag and response.status == 200 and etag_matches(headers.get('if-none-match', ''), etag):
+            return 304, response_headers, b''
+        return response.status, response_headers, body
+
+    def metrics(self):
+        """Prometheus text exposition of the proxy counters for this process"""
+        idle, busy = self.pool.counts()
+        with self.lock:
+            lines = ['# TYPE simple_web_proxy_requests_total counter']
+            lines += [f'simple_web_proxy_requests_total{{result="{result}"}} {count}'
+                      for result, count in self.results.items()]
+            lines.append('# TYPE simple_web_proxy_latency_seconds histogram')
+            lines += self.latency.render('simple_web_proxy_latency_seconds')
+            lines.append('# TYPE simple_web_backend_latency_seconds histogram')
+            lines += self.backend_latency.render('simple_web_backend_latency_seconds')
+            entries = len(self.cache)
+        lines += ['# TYPE simple_web_proxy_cache_entries gauge',
+                  f'simple_web_proxy_cache_entries {entries}',
+                  '# TYPE simple_web_proxy_pool_connections gauge',
+                  f'simple_web_proxy_pool_connections{{state="idle"}} {idle}',
+                  f'simple_web_proxy_pool_connections{{state="busy"}} {busy}',
+                  '# TYPE simple_web_proxy_breaker_open gauge',
+                  f'simple_web_proxy_breaker_open {int(self.breaker.is_open)}']
+        return ('\n'.join(lines) + '\n').encode()
+
+
+PROXY = BackendProxy(BACKEND_IP, int(BACKEND_PORT))
+
+
+def is_proxied(target):
+    """Whether a request target belongs to the backend proxy"""
+    return target == PROXY_PREFIX or target.startswith((PROXY_PREFIX + '/', PROXY_PREFIX + '?'))
+
+
+def valid_target(target):
+    """Whether a request target is printable ASCII, as http.client will send it"""
+    return all('!' <= char <= '~' for char in target)
+
+
+def handle_request(method, target, headers):
+    """Build the response for a request as (status, headers, body)"""
+    if method not in ('GET', 'HEAD'):
+        return 501, [('Content-type', 'text/plain')], b'Unsupported method'
+    if is_proxied(target):
+        if not valid_target(target):
+            body = json.dumps({"error": "Request path must be percent-encoded ASCII"}).encode()
+            return 400, [('Content-type', 'application/json')], body
+        path = target[len(PROXY_PREFIX):]
+        return PROXY.handle(path if path.startswith('/') else '/' + path, headers)
+    if target == '/metrics':
+        return 200, [('Content-type', 'text/plain; version=0.0.4')], PROXY.metrics()
+    payload = ROUTES.get(target.partition('?')[0], NOT_FOUND)
+    if payload.etag is None:
+        return payload.status, payload.headers, payload.body
+
+    response_headers = payload.headers + [('X-Timestamp', datetime.now().isoformat())]
+    body, etag = payload.body, payload.etag
+    if payload.gzip is not None and accepts_gzip(headers.get('accept-encoding', '')):
+        body, etag = payload.gzip, etag[:-1] + '-gzip"'
+        response_headers.append(('Content-Encoding', 'gzip'))
+    response_headers.append(('ETag', etag))
+
+    if payload.status == 200 and etag_matches(headers.get('if-none-match', ''), payload.etag):
+        return 304, response_headers, b''
+    return payload.status, response_headers, body
+
+
+class VPCWebHandler(http.server.BaseHTTPRequestHandler):
+    """HTTP/1.1 handler that serves VPC information over persistent connections"""
+
+    protocol_version = 'HTTP/1.1'
+    timeout = REQUEST_TIMEOUT
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.parked = False
+        self.server.track(self.connection, busy=False)
+
+    def handle(self):
+        """Answer the requests that have arrived, then park the idle connection"""
+        self.close_connection = False
+        while not self.close_connection:
+            if not self.input_ready():
+                self.parked = True
+                return
+            self.handle_one_request()
+
+    def resume(self):
+        """Serve a parked connection whose next request has arrived"""
+        self.parked = False
+        try:
+            self.handle()
+        finally:
+            self.finish()
+
+    def input_ready(self):
+        """Whether the next request is buffered or readable, without blocking"""
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return True
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def finish(self):
+        # A parked connection stays open for the server's idle loop
+        if self.parked:
+            return
+        self.server.untrack(self.connection)
+        super().finish()
+
+    def parse_request(self):
+        # The request line has arrived; drain must not cut this connection now
+        self.server.track(self.connection, busy=True)
+        return super().parse_request()
+
+    def handle_one_request(self):
+        super().handle_one_request()
+        self.server.track(self.connection, busy=False)
+
+    def respond(self, send_body=True):
+        """Send the response for the current request with its Content-Length"""
+        status, headers, body = handle_request(self.command, self.path, self.headers)
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header('Content-Length', str(len(body)))
+        if self.server.draining:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
     def do_GET(self):
         """Handle GET requests"""
-        if self.path == '/' or self.path == '/index.html':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            
-            # Format the HTML template with all variables
-            # Ensure all values are strings and properly formatted
-            try:
-                html = HTML_TEMPLATE.format(
-                    vpc_name=str(VPC_NAME),
-                    subnet_name=str(SUBNET_NAME),
-                    host_ip=str(HOST_IP),
-                    namespace=str(NAMESPACE),
-                    hostname=str(HOSTNAME),
-                    backend_ip=str(BACKEND_IP),
-                    backend_port=str(BACKEND_PORT),  # Ensure it's a string
-                    timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                )
-                self.wfile.write(html.encode())
-            except KeyError as e:
-                # If template formatting fails, send error message
-                error_msg = f"Template formatting error: Missing key {e}. BACKEND_IP={BACKEND_IP}, BACKEND_PORT={BACKEND_PORT}"
-                self.send_response(500)
-                self.end_headers()
-                self.wfile.write(error_msg.encode())
-            except Exception as e:
-                # Catch any other errors
-                error_msg = f"Error generating HTML: {e}. BACKEND_IP={BACKEND_IP}, BACKEND_PORT={BACKEND_PORT}"
-                self.send_response(500)
-                self.end_headers()
-                self.wfile.write(error_msg.encode())
-        else:
-            self.send_response(404)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            self.wfile.write(b'404 - Not Found')
-    
+        self.respond()
+
+    def do_HEAD(self):
+        """Handle HEAD requests"""
+        self.respond(send_body=False)
+
     def log_message(self, format, *args):
         """Suppress default logging"""
         pass
 
+
+# Threaded mode
+
+class PooledHTTPServer(socketserver.TCPServer):
+    """TCP server that hands connections to a fixed pool of worker threads.
+
+    A worker holds a connection only while it has a request to answer: an
+    idle keep-alive connection is parked in a selector and queued again
+    when its next request arrives, so silent clients cannot pin workers.
+    When every worker is busy the accept loop blocks, so further clients
+    wait in the kernel listen backlog instead of spawning more threads.
+    """
+
+    allow_reuse_address = True
+    request_queue_size = LISTEN_BACKLOG
+
+    def __init__(self, server_address, handler_class, threads, reuse_port=False):
+        self.reuse_port = reuse_port
+        self.draining = False
+        self.connections = {}
+        self.lock = threading.Lock()
+        self.pending = queue.Queue(maxsize=threads)
+        self.parking = queue.SimpleQueue()
+        self.parked = {}  # handler -> when it is closed for being idle
+        self.selector = selectors.DefaultSelector()
+        self.wakeup, self.wakeup_send = socket.socketpair()
+        self.selector.register(self.wakeup, selectors.EVENT_READ)
+        super().__init__(server_address, handler_class)
+        self.workers = [threading.Thread(target=self.worker, daemon=True)
+                        for _ in range(threads)]
+        for thread in self.workers:
+            thread.start()
+        threading.Thread(target=self.idle_loop, daemon=True).start()
+
+    def server_bind(self):
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+    def process_request(self, request, client_address):
+        self.pending.put((request, client_address, None))
+
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def worker(self):
+        """Serve queued connections until handed the stop sentinel"""
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            request, client_address, handler = item
+            try:
+                if handler is None:
+                    handler = self.finish_request(request, client_address)
+                else:
+                    handler.resume()
+            except Exception:
+                handler = None
+                self.handle_error(request, client_address)
+            if handler is not None and handler.parked:
+                self.parking.put(handler)
+                self.wakeup_send.send(b'\0')
+            else:
+                self.shutdown_request(request)
+
+    def idle_loop(self):
+        """Queue parked connections again when their next request arrives"""
+        while True:
+            for key, _ in self.selector.select(timeout=1):
+                if key.fileobj is self.wakeup:
+                    self.wakeup.recv(4096)
+                    continue
+                handler = key.data
+                self.selector.unregister(handler.connection)
+                del self.parked[handler]
+                if self.draining:
+                    self.close_parked(handler)
+                else:
+                    self.pending.put((handler.request, handler.client_address, handler))
+            while not self.parking.empty():
+                handler = self.parking.get()
+                self.selector.register(handler.connection, selectors.EVENT_READ, handler)
+                self.parked[handler] = time.monotonic() + handler.timeout
+            now = time.monotonic()
+            for handler, deadline in list(self.parked.items()):
+                if self.draining or deadline <= now:
+                    self.selector.unregister(handler.connection)
+                    del self.parked[handler]
+                    self.close_parked(handler)
+
+    def close_parked(self, handler):
+        handler.parked = False
+        handler.finish()
+        self.shutdown_request(handler.request)
+
+    def track(self, connection, busy):
+        with self.lock:
+            self.connections[connection] = busy
+        if self.draining and not busy:
+            self.close_idle()
+
+    def untrack(self, connection):
+        with self.lock:
+            self.connections.pop(connection, None)
+
+    def close_idle(self):
+        """End keep-alive connections that are waiting for their next request"""
+        with self.lock:
+            idle = [conn for conn, busy in self.connections.items() if not busy]
+        for conn in idle:
+            try:
+                conn.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+
+    def drain(self, timeout):
+        """Stop accepting, then let in-flight requests finish within the timeout"""
+        self.draining = True
+        self.wakeup_send.send(b'\0')
+        self.close_idle()
+        self.shutdown()
+        self.server_close()
+        for _ in self.workers:
+            self.pending.put(None)
+        deadline = time.monotonic() + timeout
+        for thread in self.workers:
+            thread.join(max(0, deadline - time.monotonic()))
+
+
+def serve_threaded(port, reuse_port):
+    """Serve with a bounded thread pool until SIGTERM or SIGINT"""
+    httpd = PooledHTTPServer(("", port), VPCWebHandler, THREADS, reuse_port)
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    stop.wait()
+    httpd.drain(DRAIN_TIMEOUT)
+
+
+# Asyncio mode
+
+class AsyncHTTPServer:
+    """Minimal HTTP/1.1 keep-alive server on asyncio streams"""
+
+    def __init__(self):
+        self.draining = False
+        self.connections = {}
+
+    async def handle_connection(self, reader, writer):
+        self.connections[writer] = False
+        try:
+            while not self.draining:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), REQUEST_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                        asyncio.TimeoutError, ConnectionError):
+                    break
+                self.connections[writer] = True
+                if not await self.handle_request(head, reader, writer):
+                    break
+                self.connections[writer] = False
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            self.connections.pop(writer, None)
+            writer.close()
+
+    async def handle_request(self, head, reader, writer):
+        """Answer one request; returns whether the connection stays open"""
+        lines = head.decode('latin-1').split('\r\n')
+        requestline = lines[0]
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(':')
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        try:
+            method, target, version = requestline.split()
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            method, version = None, 'HTTP/1.0'
+        if method is None or length < 0 or 'transfer-encoding' in headers:
+            status, response_headers, body = 400, [('Content-type', 'text/plain')], b'Bad request'
+            keep_alive = False
+        else:
+            if length:
+                await asyncio.wait_for(reader.readexactly(length), REQUEST_TIMEOUT)
+            if is_proxied(target):
+                # Proxied calls block on the backend; keep them off the event loop
+                status, response_headers, body = await asyncio.get_running_loop().run_in_executor(
+                    None, handle_request, method, target, headers)
+            else:
+                status, response_headers, body = handle_request(method, target, headers)
+            connection = headers.get('connection', '').lower()
+            if version == 'HTTP/1.1':
+                keep_alive = connection != 'close'
+            else:
+                keep_alive = connection == 'keep-alive'
+        keep_alive = keep_alive and not self.draining
+
+        out = [f'HTTP/1.1 {status} {HTTPStatus(status).phrase}',
+               f'Date: {formatdate(usegmt=True)}']
+        if status != 304:
+            out.append(f'Content-Length: {len(body)}')
+        out += [f'{name}: {value}' for name, value in response_headers]
+        out.append('Connection: keep-alive' if keep_alive else 'Connection: close')
+        payload = ('\r\n'.join(out) + '\r\n\r\n').encode('latin-1')
+        if method != 'HEAD':
+            payload += body
+        writer.write(payload)
+        await asyncio.wait_for(writer.drain(), REQUEST_TIMEOUT)
+        return keep_alive
+
+    async def serve(self, port, reuse_port):
+        loop = asyncio.get_running_loop()
+        stop = loop.create_future()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, lambda: stop.done() or stop.set_result(None))
+        server = await asyncio.start_server(self.handle_connection, port=port,
+                                            reuse_address=True, reuse_port=reuse_port,
+                                            backlog=LISTEN_BACKLOG)
+        await stop
+
+        # Drain: stop listening, drop idle keep-alive connections, wait for the rest
+        server.close()
+        self.draining = True
+        deadline = loop.time() + DRAIN_TIMEOUT
+        while self.connections and loop.time() < deadline:
+            for writer, busy in list(self.connections.items()):
+                if not busy:
+                    writer.transport.abort()
+            await asyncio.sleep(0.05)
+        for writer in list(self.connections):
+            writer.transport.abort()
+
+
+def serve_asyncio(port, reuse_port):
+    """Serve on an asyncio event loop until SIGTERM or SIGINT"""
+    asyncio.run(AsyncHTTPServer().serve(port, reuse_port))
+
+
+def serve(port, reuse_port=False):
+    if SERVER_MODE == 'asyncio':
+        serve_asyncio(port, reuse_port)
+    else:
+        serve_threaded(port, reuse_port)
+
+
+def run_workers(port, count):
+    """Fork worker processes that share the port through SO_REUSEPORT.
+
+    The kernel spreads new connections across the workers. SIGTERM is
+    passed on so every worker drains; a worker that dies is replaced.
+    """
+    children = set()
+    stopping = False
+
+    def spawn():
+        sys.stdout.flush()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                serve(port, reuse_port=True)
+            finally:
+                sys.stdout.flush()
+                os._exit(0)
+        children.add(pid)
+
+    def forward(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for _ in range(count):
+        spawn()
+    while children:
+        pid, status = os.wait()
+        children.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited with status {status}, restarting")
+            time.sleep(1)
+            spawn()
+
 def main():
     """Start the web server"""
     PORT = int(os.environ.get('PORT', 8000))
     
-    with socketserver.TCPServer(("", PORT), VPCWebHandler) as httpd:
-        print(f"Server starting on port {PORT}")
-        print(f"VPC: {VPC_NAME}, Subnet: {SUBNET_NAME}, IP: {HOST_IP}")
-        httpd.serve_forever()
+    print(f"Server starting on port {PORT}")
+    print(f"VPC: {VPC_NAME}, Subnet: {SUBNET_NAME}, IP: {HOST_IP}")
+    print(f"Mode: {SERVER_MODE}, workers: {WORKERS}")
+    if WORKERS > 1:
+        run_workers(PORT, WORKERS)
+    else:
+        serve(PORT)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file